@@ -1,7 +1,8 @@
 import streamlit as st
-import requests
+import httpx
 import json
 import os
+import time
 
 API_URL = st.secrets.get("API_URL", "https://your-api-url.run.app")
 # Page config
@@ -11,6 +12,28 @@ st.set_page_config(
     layout="centered"
 )
 
+RETRY_STATUSES = {502, 503, 504}
+
+def create_http_client():
+    """Create an HTTP/2 client that keeps its connection to the API alive"""
+    limits = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+    return httpx.Client(
+        timeout=30.0,
+        transport=httpx.HTTPTransport(http2=True, limits=limits, retries=3)
+    )
+
+def post_with_retries(url, payload, retries=3, backoff=0.5):
+    """POST to the API, retrying Cloud Run cold-start errors with exponential backoff"""
+    for attempt in range(retries + 1):
+        response = st.session_state.client.post(url, json=payload)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        time.sleep(backoff * 2 ** attempt)
+
+# Reuse one client across Streamlit reruns so the TLS connection stays open
+if "client" not in st.session_state:
+    st.session_state.client = create_http_client()
+
 # Custom CSS
 st.markdown("""
     <style>
@@ -108,13 +131,12 @@ if predict_button:
         with st.spinner("Analyzing..."):
             try:
                 # Call API
-                response = requests.post(
+                response = post_with_retries(
                     f"{API_URL}/predict",
-                    json={
+                    {
                         "premise": premise,
                         "hypothesis": hypothesis
-                    },
-                    timeout=30
+                    }
                 )
                 
                 if response.status_code == 200:
@@ -174,9 +196,9 @@ if predict_button:
                     st.error(f"API Error: {response.status_code}")
                     st.json(response.json())
                     
-            except requests.exceptions.Timeout:
+            except httpx.TimeoutException:
                 st.error("Request timed out. Please try again.")
-            except requests.exceptions.ConnectionError:
+            except httpx.ConnectError:
                 st.error("Could not connect to API. Please check your internet connection.")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
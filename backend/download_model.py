@@ -1,10 +1,13 @@
 """
-Script to download W&B model artifact and base model during Docker build
+Script to download W&B model artifact and base model during Docker build,
+merge the LoRA adapter into the base model and export it for serving
 """
 import wandb
 import os
+import shutil
 import sys
-from huggingface_hub import login as hf_login
+from huggingface_hub import login as hf_login, snapshot_download
+from peft import PeftModel
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
 WANDB_API_KEY = os.getenv("WANDB_API_KEY")
@@ -27,32 +30,117 @@ else:
     print("WARNING: No HF_TOKEN provided, may hit rate limits")
 
 BASE_MODEL = "microsoft/deberta-v3-base"
-BASE_MODEL_DIR = "./base_model"
-
-tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
-tokenizer.save_pretrained(BASE_MODEL_DIR)
+LORA_ADAPTER_DIR = "./lora_adapter"
+MERGED_MODEL_DIR = "./merged_model"
+ONNX_MODEL_DIR = "./onnx_model"
+
+# Download into the standard HF cache (HF_HOME) instead of a side copy, skipping TF weights
+snapshot_path = snapshot_download(
+    BASE_MODEL,
+    allow_patterns=["*.json", "*.model", "*.safetensors", "pytorch_model.bin"]
+)
 
-base_model = AutoModelForSequenceClassification.from_pretrained(BASE_MODEL, num_labels=3)
-base_model.save_pretrained(BASE_MODEL_DIR)
+print(f"Base model cached at: {snapshot_path}")
 
-print(f"Base model saved to: {BASE_MODEL_DIR}")
+tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL, local_files_only=True)
+base_model = AutoModelForSequenceClassification.from_pretrained(
+    BASE_MODEL,
+    num_labels=3,
+    local_files_only=True
+)
 
 
 print(f"Downloading LoRA adapter from W&B...")
 
 wandb.login(key=WANDB_API_KEY)
 
-run = wandb.init(
-    project=WANDB_PROJECT,
-    entity=WANDB_ENTITY,
-    job_type="model_download"
-)
-
+# Fetch the artifact through the public API; no W&B run is needed just to download it
 artifact_path = f"{WANDB_ENTITY}/{WANDB_PROJECT}/{WANDB_ARTIFACT}"
-artifact = run.use_artifact(artifact_path, type='model')
-adapter_dir = artifact.download(root="./lora_adapter")
+artifact = wandb.Api().artifact(artifact_path, type='model')
+adapter_dir = artifact.download(root=LORA_ADAPTER_DIR)
 
 print(f"LoRA adapter downloaded to: {adapter_dir}")
 
-wandb.finish()
+
+print("Merging LoRA adapter with base model...")
+
+merged_model = PeftModel.from_pretrained(base_model, adapter_dir).merge_and_unload()
+merged_model.save_pretrained(MERGED_MODEL_DIR, safe_serialization=True)
+tokenizer.save_pretrained(MERGED_MODEL_DIR)
+
+# Only the merged weights are served, so the adapter does not need to ship in the image
+shutil.rmtree(LORA_ADAPTER_DIR)
+
+print(f"Merged model saved to: {MERGED_MODEL_DIR}")
+
+
+print("Exporting merged model to ONNX...")
+
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTOptimizer, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+
+ort_model = ORTModelForSequenceClassification.from_pretrained(MERGED_MODEL_DIR, export=True)
+
+# Fuse LayerNorm/GELU/attention and fold constants -> model_optimized.onnx
+optimizer = ORTOptimizer.from_pretrained(ort_model)
+optimizer.optimize(
+    save_dir=ONNX_MODEL_DIR,
+    optimization_config=OptimizationConfig(optimization_level=99)
+)
+
+# int8 dynamic quantization for the CPU provider -> model_optimized_quantized.onnx
+quantizer = ORTQuantizer.from_pretrained(ONNX_MODEL_DIR, file_name="model_optimized.onnx")
+quantizer.quantize(
+    save_dir=ONNX_MODEL_DIR,
+    quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+)
+tokenizer.save_pretrained(ONNX_MODEL_DIR)
+
+print(f"ONNX model saved to: {ONNX_MODEL_DIR}")
+
+
+if os.getenv("EXPORT_AOTI", "0") == "1":
+    print("Compiling merged model with AOTInductor...")
+
+    import torch
+
+    AOTI_PACKAGE_PATH = "./model.pt2"
+    # Upper bound on the batch dimension; the runtime MAX_BATCH_SIZE must not exceed it
+    MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+    MAX_LENGTH = 256
+
+    class LogitsOnly(torch.nn.Module):
+        """(input_ids, attention_mask) -> logits, the signature served by main.py"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    example = tokenizer(
+        ["premise"] * 2,
+        ["hypothesis"] * 2,
+        padding="max_length",
+        max_length=MAX_LENGTH,
+        return_tensors="pt"
+    )
+
+    # One artifact covers every batch size and sequence length the API serves
+    batch = torch.export.Dim("batch", min=1, max=MAX_BATCH_SIZE)
+    seq = torch.export.Dim("seq", min=1, max=MAX_LENGTH)
+
+    with torch.no_grad():
+        exported = torch.export.export(
+            LogitsOnly(merged_model.eval()),
+            (example["input_ids"], example["attention_mask"]),
+            dynamic_shapes={
+                "input_ids": {0: batch, 1: seq},
+                "attention_mask": {0: batch, 1: seq}
+            }
+        )
+        torch._inductor.aoti_compile_and_package(exported, package_path=AOTI_PACKAGE_PATH)
+
+    print(f"AOTInductor package saved to: {AOTI_PACKAGE_PATH}")
 print("Download complete!")
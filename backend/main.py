@@ -1,9 +1,20 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers.modeling_outputs import SequenceClassifierOutput
 import torch
+import asyncio
 import logging
+import orjson
+import os
+import threading
+import time
+import xxhash
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 
 # Configure logging
@@ -24,10 +35,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (mainly /batch_predict) for clients that send Accept-Encoding: gzip;
+# streamed NDJSON chunks are sync-flushed, so each line still goes out as soon as it is ready
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+# Dynamic batching settings for /predict
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+BATCH_WAIT_MS = float(os.getenv("BATCH_WAIT_MS", "10"))
+
+# Length buckets (in tokens) used to group pairs before padding
+MAX_LENGTH = 256
+BUCKETS = [32, 64, 128, MAX_LENGTH]
+
+# Quantize to int8 on CPU / cast to half precision on GPU
+QUANTIZE = os.getenv("QUANTIZE", "1") == "1"
+
+# Compile the model with torch.compile (slower cold start, faster steady state)
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"
+
+# Attention kernel for the PyTorch backend ("sdpa", "eager", ...); unset lets transformers
+# pick SDPA when the architecture supports it and eager otherwise
+ATTN_IMPLEMENTATION = os.getenv("ATTN_IMPLEMENTATION")
+
+# Inference backend: "torch" (eager PyTorch), "onnx" (ONNX Runtime export)
+# or "aoti" (AOTInductor package, built with EXPORT_AOTI=1 for batch sizes up to MAX_BATCH_SIZE)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+# Number of (premise, hypothesis) predictions kept in the in-process LRU cache
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+
+# Number of tokenized pairs kept in the tokenizer LRU cache
+TOKENIZER_CACHE_SIZE = int(os.getenv("TOKENIZER_CACHE_SIZE", "8192"))
+
+# Worker processes (WEB_CONCURRENCY is also read by gunicorn) and intra-op threads per worker,
+# split so workers x threads matches the available cores without oversubscription
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", str(max(1, os.cpu_count() // WEB_CONCURRENCY))))
+
+# Load the model at import time so `gunicorn --preload` can share it across workers
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "0") == "1"
+
+# Model artifacts produced by download_model.py during the Docker build
+MERGED_MODEL_DIR = "./merged_model"
+ONNX_MODEL_DIR = "./onnx_model"
+AOTI_PACKAGE_PATH = "./model.pt2"
 
 model = None
 tokenizer = None
 device = None
+request_queue = None
+batcher_task = None
+
+# Single thread that owns every forward pass, so the event loop stays free
+# and torch intra-op threads are never contended by concurrent requests
+inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+# Keep a single inter-op thread; this can only be set once per process, before any parallel work
+torch.set_num_interop_threads(1)
 
 class PredictionRequest(BaseModel):
     premise: str
@@ -65,48 +130,352 @@ class BatchPredictionRequest(BaseModel):
             }
         }
 
-@app.on_event("startup")
-async def load_model():
-    """Load base model and LoRA adapter from local directories (downloaded during build)"""
+class PairCache:
+    """
+    Thread-safe LRU cache of per-pair values (predictions, tokenizations)
+    
+    Entries are keyed on a 64-bit xxhash of the pair so memory stays bounded
+    by the number of entries, not by the length of the texts.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def key(premise: str, hypothesis: str) -> int:
+        # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+        return xxhash.xxh64_intdigest(f"{len(premise)}:{premise}{hypothesis}".encode("utf-8"))
+    
+    def get(self, premise: str, hypothesis: str):
+        """Return the cached value for a pair, or None"""
+        key = self.key(premise, hypothesis)
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+    
+    def put(self, premise: str, hypothesis: str, result):
+        key = self.key(premise, hypothesis)
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.entries),
+                "maxsize": self.maxsize
+            }
+
+prediction_cache = PairCache(PREDICTION_CACHE_SIZE)
+tokenizer_cache = PairCache(TOKENIZER_CACHE_SIZE)
+
+def tokenize_pair(premise: str, hypothesis: str):
+    """
+    Tokenize a single pair without padding (cached)
+    
+    Returns a plain dict of token id lists so cached entries can be padded
+    together with tokenizer.pad() and moved to any device; treat it as read-only.
+    """
+    encoding = tokenizer_cache.get(premise, hypothesis)
+    if encoding is None:
+        # dict() drops the fast tokenizer's Encoding objects (tokens, offsets, ...), which are never read
+        encoding = dict(tokenizer(premise, hypothesis, truncation=True, max_length=MAX_LENGTH))
+        tokenizer_cache.put(premise, hypothesis, encoding)
+    return encoding
+
+def run_model(encodings):
+    """
+    Pad tokenized pairs into one batch and run the model (called on the inference thread)
+    
+    Returns a (pred_idx, probabilities) tuple of plain Python values per pair.
+    """
+    inputs = tokenizer.pad(encodings, padding="longest", return_tensors="pt").to(device)
+    
+    with torch.inference_mode():
+        probs = torch.softmax(model(**inputs).logits, dim=-1)
+    
+    # One device-to-host copy for the whole batch, then pick labels in Python
+    probs_cpu = probs.cpu().tolist()
+    return [(max(range(len(row)), key=row.__getitem__), tuple(row)) for row in probs_cpu]
+
+def warm_up():
+    """
+    Run dummy forward passes before serving (called on the inference thread)
+    
+    Triggers one-time work such as oneDNN primitive creation, cuDNN algorithm
+    selection and CUDA context setup so the first real request does not pay
+    for it. With torch.compile or AOTInductor every bucket is warmed at every
+    batch size the batcher can produce.
+    """
+    if TORCH_COMPILE or INFERENCE_BACKEND == "aoti":
+        batch_sizes = [bs for bs in (1, 2, 4, 8, 16, 32, 64) if bs <= MAX_BATCH_SIZE]
+    else:
+        batch_sizes = [1]
+    
+    for cap in BUCKETS:
+        encoding = tokenizer(
+            "premise",
+            "hypothesis",
+            truncation=True,
+            max_length=cap,
+            padding="max_length"
+        )
+        for batch_size in batch_sizes:
+            run_model([encoding] * batch_size)
+    
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+def load_torch_model():
+    """Load the merged model and prepare it for inference"""
+    logger.info(f"Loading merged model from: {MERGED_MODEL_DIR}")
+    
+    # Half precision on GPU; on CPU int8 quantization happens after loading in FP32
+    if QUANTIZE and device.type == "cuda":
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    else:
+        dtype = torch.float32
+    
+    # Memory-map the safetensors weights straight onto the target device
+    load_kwargs = {
+        "dtype": dtype,
+        "low_cpu_mem_usage": True,
+        "device_map": {"": str(device)},
+        "local_files_only": True
+    }
+    
+    if ATTN_IMPLEMENTATION:
+        load_kwargs["attn_implementation"] = ATTN_IMPLEMENTATION
+    
+    model = AutoModelForSequenceClassification.from_pretrained(MERGED_MODEL_DIR, **load_kwargs)
+    logger.info(f"Attention implementation: {model.config._attn_implementation}")
+    logger.info(f"Model loaded as {dtype} on {device}")
+    
+    if QUANTIZE and device.type == "cpu":
+        # Embeddings and LayerNorm stay FP32, the Linear layers that dominate the weights go int8.
+        # inplace=True avoids a deepcopy that would read every mmap'd page into memory.
+        logger.info("Applying int8 dynamic quantization to Linear layers...")
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    
+    model.eval()
+    
+    if TORCH_COMPILE:
+        logger.info("Compiling model with torch.compile...")
+        model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+    
+    return model
+
+def load_onnx_model():
+    """Load the ONNX Runtime export of the merged model (built by download_model.py)"""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session_options.intra_op_num_threads = INFERENCE_THREADS
+    
+    # int8 dynamic quantization only has CPU kernels, so CUDA uses the optimized FP32 graph
+    if device.type == "cuda":
+        provider = "CUDAExecutionProvider"
+        file_name = "model_optimized.onnx"
+    else:
+        provider = "CPUExecutionProvider"
+        file_name = "model_optimized_quantized.onnx" if QUANTIZE else "model_optimized.onnx"
+    
+    logger.info(f"Loading ONNX model from: {ONNX_MODEL_DIR}/{file_name} ({provider})")
+    
+    return ORTModelForSequenceClassification.from_pretrained(
+        ONNX_MODEL_DIR,
+        file_name=file_name,
+        provider=provider,
+        session_options=session_options
+    )
+
+class AOTIClassifier:
+    """Wrap an AOTInductor package so it is called like the Hugging Face model"""
+    
+    def __init__(self, package_path: str):
+        self.runner = torch._inductor.aoti_load_package(package_path)
+    
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        # The package was exported with (input_ids, attention_mask) -> logits only
+        return SequenceClassifierOutput(logits=self.runner(input_ids, attention_mask))
+
+def load_aoti_model():
+    """Load the AOTInductor-compiled merged model (built by download_model.py)"""
+    logger.info(f"Loading AOTInductor package from: {AOTI_PACKAGE_PATH}")
+    return AOTIClassifier(AOTI_PACKAGE_PATH)
+
+def load_weights():
+    """Load the model and tokenizer from local directories (downloaded during build)"""
     global model, tokenizer, device
     
-    logger.info("Loading model from local directory...")
+    logger.info(f"Loading model from local directory (backend: {INFERENCE_BACKEND})...")
+    
+    # Determine device (the AOTInductor package is compiled for CPU at build time)
+    if INFERENCE_BACKEND == "aoti":
+        device = torch.device("cpu")
+    else:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    logger.info(f"Using device: {device}")
+    
+    # Load tokenizer saved alongside the merged model
+    tokenizer = AutoTokenizer.from_pretrained(MERGED_MODEL_DIR, local_files_only=True)
+    
+    if INFERENCE_BACKEND == "onnx":
+        model = load_onnx_model()
+    elif INFERENCE_BACKEND == "aoti":
+        model = load_aoti_model()
+    else:
+        model = load_torch_model()
+    
+    logger.info("Model loaded successfully!")
+
+# With `gunicorn --preload` the master imports this module once and forks the
+# workers, which then share the read-only weight pages copy-on-write. ONNX Runtime
+# sessions (own thread pools) and CUDA contexts do not survive fork, so those
+# backends always load in each worker instead.
+if PRELOAD_MODEL and INFERENCE_BACKEND != "onnx" and not torch.cuda.is_available():
+    load_weights()
+
+@app.on_event("startup")
+async def load_model():
+    """Per-worker setup: load the model unless preloaded, warm it up and start the batcher"""
+    global request_queue, batcher_task
     
     try:
-        from peft import PeftModel
+        if model is None:
+            load_weights()
         
-        # Determine device
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {device}")
+        loop = asyncio.get_running_loop()
         
-        base_model_dir = "./base_model"
-        lora_adapter_dir = "./lora_adapter"
+        # Size the intra-op pool of the inference thread, which runs every forward pass
+        await loop.run_in_executor(inference_pool, torch.set_num_threads, INFERENCE_THREADS)
+        logger.info(f"Using {INFERENCE_THREADS} inference threads ({WEB_CONCURRENCY} workers)")
         
-        logger.info(f"Loading base model from: {base_model_dir}")
-        logger.info(f"Loading LoRA adapter from: {lora_adapter_dir}")
+        # Warm up on the inference thread, since its intra-op thread pool serves every request
+        start = time.perf_counter()
+        await loop.run_in_executor(inference_pool, warm_up)
+        logger.info(f"Model warmed up in {time.perf_counter() - start:.1f}s")
         
-        # Load tokenizer from base model
-        tokenizer = AutoTokenizer.from_pretrained(base_model_dir)
+        # Start the background batcher that serves /predict
+        request_queue = asyncio.Queue()
+        batcher_task = asyncio.create_task(batcher())
+        logger.info(f"Dynamic batching enabled (max batch size: {MAX_BATCH_SIZE}, wait: {BATCH_WAIT_MS} ms)")
         
-        # Load base model
-        base_model = AutoModelForSequenceClassification.from_pretrained(
-            base_model_dir,
-            num_labels=3
-        )
+    except Exception as e:
+        logger.error(f"Error loading model: {e}")
+        raise
+
+def bucket_for(length: int) -> int:
+    """Return the smallest length bucket that fits a tokenized pair"""
+    for cap in BUCKETS:
+        if length <= cap:
+            return cap
+    return BUCKETS[-1]
+
+async def batcher():
+    """
+    Collect pending /predict requests and run them through the model together
+    
+    Waits for the first request, then keeps collecting for up to BATCH_WAIT_MS
+    or until MAX_BATCH_SIZE pairs are queued. Pairs are grouped into length
+    buckets and only the fullest bucket is run per forward pass, so short pairs
+    are not padded to the length of long ones. The rest stay pending.
+    """
+    loop = asyncio.get_running_loop()
+    pending = []  # (encoding, future, bucket, received_at)
+    max_pending = MAX_BATCH_SIZE * len(BUCKETS)
+    max_pending_wait = BATCH_WAIT_MS * 10 / 1000
+    
+    while True:
+        received = []
         
-        # Load and merge LoRA adapter
-        logger.info("Merging LoRA adapter with base model...")
-        model = PeftModel.from_pretrained(base_model, lora_adapter_dir)
-        model = model.merge_and_unload()  # Merge LoRA weights into base model
+        if not pending:
+            received.append(await request_queue.get())
+            deadline = loop.time() + BATCH_WAIT_MS / 1000
+            
+            while len(received) < MAX_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    received.append(await asyncio.wait_for(request_queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
         
-        model.to(device)
-        model.eval()
+        # Top up from anything else already queued, without waiting
+        while len(pending) + len(received) < max_pending and not request_queue.empty():
+            received.append(request_queue.get_nowait())
         
-        logger.info("Model loaded and LoRA adapter merged successfully!")
+        # Tokenize new pairs individually to find their true length
+        now = loop.time()
+        for (premise, hypothesis), future in received:
+            try:
+                encoding = tokenize_pair(premise, hypothesis)
+            except Exception as e:
+                logger.error(f"Tokenization error: {e}")
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            pending.append((encoding, future, bucket_for(len(encoding["input_ids"])), now))
         
-    except Exception as e:
-        logger.error(f"Error loading model: {e}")
-        raise
+        # Drop requests that were cancelled (e.g. client disconnected)
+        pending = [item for item in pending if not item[1].done()]
+        if not pending:
+            continue
+        
+        # Run the fullest bucket, unless the oldest pair has been passed over for too long
+        oldest_bucket, oldest_received_at = pending[0][2], pending[0][3]
+        if now - oldest_received_at > max_pending_wait:
+            cap = oldest_bucket
+        else:
+            counts = Counter(bucket for _, _, bucket, _ in pending)
+            cap = max(counts, key=counts.get)
+        
+        batch, rest = [], []
+        for item in pending:
+            if item[2] == cap and len(batch) < MAX_BATCH_SIZE:
+                batch.append(item)
+            else:
+                rest.append(item)
+        pending = rest
+        
+        futures = [future for _, future, _, _ in batch]
+        
+        try:
+            # Pad only to the longest pair in the bucket
+            results = await loop.run_in_executor(
+                inference_pool, run_model, [encoding for encoding, _, _, _ in batch]
+            )
+        
+        except Exception as e:
+            logger.error(f"Batch inference error: {e}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
 
 @app.get("/")
 def root():
@@ -119,7 +488,8 @@ def root():
         "endpoints": {
             "predict": "/predict",
             "batch_predict": "/batch_predict",
-            "health": "/health"
+            "health": "/health",
+            "cache_stats": "/cache/stats"
         }
     }
 
@@ -132,8 +502,18 @@ def health_check():
         "device": str(device)
     }
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Prediction and tokenizer cache statistics"""
+    return {
+        "predictions": prediction_cache.stats(),
+        "tokenizer": tokenizer_cache.stats()
+    }
+
+# With a response_model and the default response class, FastAPI validates the dict and
+# serializes it straight to JSON bytes in pydantic-core, without a jsonable_encoder pass
 @app.post("/predict", response_model=PredictionResponse)
-def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest):
     """
     Predict the relationship between premise and hypothesis
     
@@ -143,88 +523,122 @@ def predict(request: PredictionRequest):
     - probabilities: Probabilities for all classes
     """
     try:
-        # Tokenize input
-        inputs = tokenizer(
-            request.premise,
-            request.hypothesis,
-            return_tensors="pt",
-            truncation=True,
-            max_length=256,
-            padding=True
-        ).to(device)
+        cached = prediction_cache.get(request.premise, request.hypothesis)
         
-        # Get predictions
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
-            probs = torch.softmax(logits, dim=-1)[0]
-            pred_idx = torch.argmax(probs).item()
+        if cached is not None:
+            pred_idx, probs = cached
+        else:
+            # Queue the pair for the batcher and wait for its prediction
+            future = asyncio.get_running_loop().create_future()
+            await request_queue.put(((request.premise, request.hypothesis), future))
+            pred_idx, probs = await future
+            prediction_cache.put(request.premise, request.hypothesis, (pred_idx, probs))
         
         # Map to labels
         labels = ["Entailment", "Neutral", "Contradiction"]
         
-        return PredictionResponse(
-            prediction=labels[pred_idx],
-            confidence=float(probs[pred_idx]),
-            probabilities={
-                "entailment": float(probs[0]),
-                "neutral": float(probs[1]),
-                "contradiction": float(probs[2])
+        return {
+            "prediction": labels[pred_idx],
+            "confidence": probs[pred_idx],
+            "probabilities": {
+                "entailment": probs[0],
+                "neutral": probs[1],
+                "contradiction": probs[2]
             }
-        )
+        }
         
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/batch_predict")
-def batch_predict(request: BatchPredictionRequest):
+async def batch_predict(request: BatchPredictionRequest):
     """
     Predict relationships for multiple premise-hypothesis pairs
     
-    Returns list of predictions
+    Streams newline-delimited JSON, one prediction per line, each tagged with
+    "i", the index of its pair in the request. Lines are sent as soon as each
+    chunk of MAX_BATCH_SIZE pairs has been run. If a chunk fails after
+    streaming has started, a final {"i": <first index of the chunk>, "error": ...}
+    line is sent instead of the remaining predictions.
     """
     try:
-        results = []
-        
-        for pair in request.pairs:
-            # Tokenize
-            inputs = tokenizer(
-                pair["premise"],
-                pair["hypothesis"],
-                return_tensors="pt",
-                truncation=True,
-                max_length=256,
-                padding=True
-            ).to(device)
-            
-            # Predict
-            with torch.no_grad():
-                outputs = model(**inputs)
-                logits = outputs.logits
-                probs = torch.softmax(logits, dim=-1)[0]
-                pred_idx = torch.argmax(probs).item()
-            
-            labels = ["Entailment", "Neutral", "Contradiction"]
-            
-            results.append({
-                "premise": pair["premise"],
-                "hypothesis": pair["hypothesis"],
-                "prediction": labels[pred_idx],
-                "confidence": float(probs[pred_idx]),
-                "probabilities": {
-                    "entailment": float(probs[0]),
-                    "neutral": float(probs[1]),
-                    "contradiction": float(probs[2])
-                }
-            })
-        
-        return {"results": results}
-        
+        premises = [pair["premise"] for pair in request.pairs]
+        hypotheses = [pair["hypothesis"] for pair in request.pairs]
     except Exception as e:
         logger.error(f"Batch prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    labels = ["Entailment", "Neutral", "Contradiction"]
+    
+    async def generate():
+        loop = asyncio.get_running_loop()
+        
+        for start in range(0, len(premises), MAX_BATCH_SIZE):
+            chunk = range(start, min(start + MAX_BATCH_SIZE, len(premises)))
+            
+            try:
+                # Serve repeated pairs from the cache and only run the rest through the model
+                results = [prediction_cache.get(premises[i], hypotheses[i]) for i in chunk]
+                misses = [j for j, cached in enumerate(results) if cached is None]
+                
+                if misses:
+                    encodings = [tokenize_pair(premises[chunk[j]], hypotheses[chunk[j]]) for j in misses]
+                    computed = await loop.run_in_executor(inference_pool, run_model, encodings)
+                    
+                    for j, result in zip(misses, computed):
+                        results[j] = result
+                        prediction_cache.put(premises[chunk[j]], hypotheses[chunk[j]], result)
+            
+            except Exception as e:
+                logger.error(f"Batch prediction error: {e}")
+                yield orjson.dumps({"i": start, "error": str(e)}) + b"\n"
+                return
+            
+            for i, (pred_idx, probs) in zip(chunk, results):
+                yield orjson.dumps({
+                    "i": i,
+                    "premise": premises[i],
+                    "hypothesis": hypotheses[i],
+                    "prediction": labels[pred_idx],
+                    "confidence": probs[pred_idx],
+                    "probabilities": {
+                        "entailment": probs[0],
+                        "neutral": probs[1],
+                        "contradiction": probs[2]
+                    }
+                }) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    
+    parser = argparse.ArgumentParser(description="Serve the ANLI NLI inference API")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help="Maximum number of /predict requests per forward pass")
+    parser.add_argument("--batch-wait-ms", type=float, default=BATCH_WAIT_MS,
+                        help="How long to wait for more requests before running a batch")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes")
+    args = parser.parse_args()
+    
+    MAX_BATCH_SIZE = args.batch_size
+    BATCH_WAIT_MS = args.batch_wait_ms
+    
+    if args.workers == 1:
+        uvicorn.run(app, host="0.0.0.0", port=8080)
+    else:
+        # Workers import the app afresh, so pass the settings through the environment
+        os.environ["MAX_BATCH_SIZE"] = str(args.batch_size)
+        os.environ["BATCH_WAIT_MS"] = str(args.batch_wait_ms)
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+        
+        uvicorn.run(
+            "main:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host="0.0.0.0",
+            port=8080,
+            workers=args.workers
+        )
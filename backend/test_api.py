@@ -2,20 +2,32 @@
 Test script for the deployed Cloud Run API
 """
 
-import requests
+import asyncio
+import httpx
 import json
+import time
 
 
 SERVICE_URL = "https://your-service-url.run.app"
 
-def test_health():
+def create_client():
+    """Create an HTTP/2 client so concurrent requests share one TLS connection"""
+    limits = httpx.Limits(max_keepalive_connections=16, keepalive_expiry=60)
+    return httpx.AsyncClient(
+        base_url=SERVICE_URL,
+        timeout=60.0,
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3)
+    )
+
+async def test_health(client):
     """Test health endpoint"""
     print("Testing /health endpoint...")
-    response = requests.get(f"{SERVICE_URL}/health")
+    response = await client.get("/health")
     print(f"Status: {response.status_code}")
+    print(f"HTTP version: {response.http_version}")
     print(f"Response: {json.dumps(response.json(), indent=2)}\n")
 
-def test_single_prediction():
+async def test_single_prediction(client):
     """Test single prediction"""
     print("Testing /predict endpoint...")
     
@@ -24,17 +36,14 @@ def test_single_prediction():
         "hypothesis": "A person is outside"
     }
     
-    response = requests.post(
-        f"{SERVICE_URL}/predict",
-        json=data
-    )
+    response = await client.post("/predict", json=data)
     
     print(f"Status: {response.status_code}")
     print(f"Request: {json.dumps(data, indent=2)}")
     print(f"Response: {json.dumps(response.json(), indent=2)}\n")
 
-def test_batch_prediction():
-    """Test batch prediction"""
+async def test_batch_prediction(client):
+    """Test batch prediction, alongside the same pairs sent concurrently to /predict"""
     print("Testing /batch_predict endpoint...")
     
     data = {
@@ -54,36 +63,59 @@ def test_batch_prediction():
         ]
     }
     
-    response = requests.post(
-        f"{SERVICE_URL}/batch_predict",
-        json=data
+    # Results are streamed back as newline-delimited JSON
+    async with client.stream("POST", "/batch_predict", json=data) as response:
+        print(f"Status: {response.status_code}")
+        async for line in response.aiter_lines():
+            if line:
+                print(f"Result: {json.dumps(json.loads(line), indent=2)}")
+    print()
+    
+    print("Testing concurrent /predict requests...")
+    
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *(client.post("/predict", json=pair) for pair in data["pairs"])
     )
+    elapsed = time.perf_counter() - start
     
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}\n")
+    print(f"Statuses: {[r.status_code for r in responses]}")
+    print(f"{len(responses)} concurrent requests took {elapsed:.2f}s\n")
 
-def test_edge_cases():
-    """Test edge cases"""
+async def test_edge_cases(client):
+    """Test edge cases (sent concurrently)"""
     print("Testing edge cases...")
     
     # Very long text
     long_premise = "This is a very long premise. " * 100
-    data = {
+    long_data = {
         "premise": long_premise,
         "hypothesis": "This is short"
     }
     
-    response = requests.post(f"{SERVICE_URL}/predict", json=data)
-    print(f"Long text - Status: {response.status_code}")
-    
     # Empty text
-    data = {
+    empty_data = {
         "premise": "",
         "hypothesis": ""
     }
     
-    response = requests.post(f"{SERVICE_URL}/predict", json=data)
-    print(f"Empty text - Status: {response.status_code}\n")
+    start = time.perf_counter()
+    long_response, empty_response = await asyncio.gather(
+        client.post("/predict", json=long_data),
+        client.post("/predict", json=empty_data)
+    )
+    elapsed = time.perf_counter() - start
+    
+    print(f"Long text - Status: {long_response.status_code}")
+    print(f"Empty text - Status: {empty_response.status_code}")
+    print(f"Both requests took {elapsed:.2f}s\n")
+
+async def main():
+    async with create_client() as client:
+        await test_health(client)
+        await test_single_prediction(client)
+        await test_batch_prediction(client)
+        await test_edge_cases(client)
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -91,16 +123,13 @@ if __name__ == "__main__":
     print("=" * 60 + "\n")
     
     try:
-        test_health()
-        test_single_prediction()
-        test_batch_prediction()
-        test_edge_cases()
-        
+        asyncio.run(main())
+    
         print("=" * 60)
         print("All tests completed!")
         print("=" * 60)
-        
-    except requests.exceptions.ConnectionError:
+    
+    except httpx.ConnectError:
         print("ERROR: Could not connect to service.")
         print("Make sure SERVICE_URL is set correctly and the service is running.")
     except Exception as e: